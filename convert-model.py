@@ -0,0 +1,61 @@
+"""Export the pickled XGBoost model to XGBoost's native UBJ format.
+
+The SHA-256 of the pickle is stored in the export's attributes. The app loads
+models/XBR_trained_hdb_resale_modelV4a.ubj only while that hash matches the
+current pickle, and logs a warning and falls back to the pickle otherwise.
+Re-run this after replacing the pickle:
+
+    python convert-model.py
+
+After saving, the export is reloaded and its predictions are compared with the
+pickle's on a sample of rows. A mismatching export is deleted.
+"""
+import hashlib
+import os
+import sys
+
+import joblib
+import numpy as np
+import xgboost as xgb
+
+models_dir = os.path.join(os.path.dirname(__file__), "models")
+pkl_path = os.path.join(models_dir, "XBR_trained_hdb_resale_modelV4a.pkl")
+ubj_path = os.path.join(models_dir, "XBR_trained_hdb_resale_modelV4a.ubj")
+
+with open(pkl_path, "rb") as f:
+    pkl_sha256 = hashlib.sha256(f.read()).hexdigest()
+
+model = joblib.load(pkl_path)
+booster = model.get_booster()
+booster.set_attr(source_sha256=pkl_sha256)
+booster.save_model(ubj_path)
+
+# Sample rows in the app's feature layout: floor area, lease commencement
+# date, postal code and current year, then the 26 town and remaining
+# flat_type one-hot columns.
+n_rows = 1000
+n_towns = 26
+n_flat_types = booster.num_features() - 4 - n_towns
+rng = np.random.default_rng(0)
+rows = np.arange(n_rows)
+sample = np.zeros((n_rows, booster.num_features()), dtype=np.float32)
+sample[:, 0] = rng.uniform(30.0, 200.0, n_rows)
+sample[:, 1] = rng.integers(1960, 2025, n_rows)
+sample[:, 2] = rng.integers(10000, 1000000, n_rows)
+sample[:, 3] = 2024
+sample[rows, 4 + rng.integers(0, n_towns, n_rows)] = 1.0
+sample[rows, 4 + n_towns + rng.integers(0, n_flat_types, n_rows)] = 1.0
+
+exported = xgb.Booster()
+exported.load_model(ubj_path)
+expected = booster.inplace_predict(sample)
+actual = exported.inplace_predict(sample)
+if not np.array_equal(expected, actual):
+    os.remove(ubj_path)
+    sys.exit(
+        f"Export predictions differ from the pickle on "
+        f"{np.count_nonzero(expected != actual)} of {n_rows} rows; "
+        f"removed {ubj_path}"
+    )
+
+print(f"Saved {ubj_path} (predictions match the pickle on {n_rows} rows)")
@@ -2,8 +2,14 @@ import streamlit as st
 import pandas as pd
 import joblib
 import numpy as np
+import xgboost as xgb
+import hashlib
+import io
+import logging
 import os
 
+logger = logging.getLogger(__name__)
+
 # Set page config
 st.set_page_config(
     page_title="HDB Resale Price Predictor",
@@ -15,53 +21,63 @@ st.set_page_config(
 st.title("HDB Resale Price Predictor")
 st.write("Predict HDB resale prices based on various features")
 
-# Load the model
+MODEL_NAME = "XBR_trained_hdb_resale_modelV4a"
+
+# Load the model. The cache is keyed on model_name, so each model file is held
+# in memory once per process and can be evicted with load_model.clear().
 @st.cache_resource
-def load_model():
-    model_path = os.path.join(
-        os.path.dirname(__file__),
-        "models",
-        "XBR_trained_hdb_resale_modelV4a.pkl",
-    )
+def load_model(model_name):
+    models_dir = os.path.join(os.path.dirname(__file__), "models")
+    ubj_path = os.path.join(models_dir, f"{model_name}.ubj")
+    pkl_path = os.path.join(models_dir, f"{model_name}.pkl")
     try:
-        return joblib.load(model_path)
+        # Prefer the native UBJ export (see convert-model.py): it loads faster
+        # than the pickle and never builds the sklearn wrapper. Predictions go
+        # through the raw booster either way, which skips the wrapper's
+        # per-call DMatrix construction and input validation.
+        booster = None
+        if os.path.exists(ubj_path):
+            booster = xgb.Booster()
+            booster.load_model(ubj_path)
+
+            # convert-model.py records the hash of the pickle it exported.
+            # If the pickle has been replaced since, the .ubj is stale.
+            if os.path.exists(pkl_path):
+                with open(pkl_path, "rb") as f:
+                    pkl_sha256 = hashlib.sha256(f.read()).hexdigest()
+                if booster.attr("source_sha256") != pkl_sha256:
+                    logger.warning(
+                        "%s does not match %s; loading the pickle instead. "
+                        "Run convert-model.py to refresh the export.",
+                        ubj_path,
+                        pkl_path,
+                    )
+                    booster = None
+
+        if booster is None:
+            booster = joblib.load(pkl_path).get_booster()
     except Exception as e:
         st.error(f"Error loading model: {str(e)}")
         return None
 
-model = load_model()
-
-if model is None:
-    st.error(
-        "Could not load the model. Please check if the model file exists in the correct location."
-    )
-    st.stop()
+    booster.set_param({"nthread": 1})
 
-# Create columns for input
-col1, col2 = st.columns(2)
+    # Throwaway prediction so XGBoost's lazy initialisation happens here,
+    # once per process, instead of on the first click.
+    try:
+        booster.inplace_predict(
+            np.zeros((1, booster.num_features()), dtype=np.float32)
+        )
+    except Exception:
+        pass
 
-with col1:
-    # Numerical inputs
-    floor_area = st.number_input(
-        "Floor Area (sqm)", min_value=1.0, max_value=500.0, value=148.0
-    )
-    lease_commence_date = st.number_input(
-        "Lease Commencement Date",
-        min_value=1960,
-        max_value=2024,
-        value=1992,
-    )
-    postal_code = st.number_input(
-        "Postal Code",
-        min_value=10000,
-        max_value=999999,
-        value=520329,
-    )
-    current_year = 2024  # You can make this dynamic if needed
+    return booster
 
-with col2:
-    # Categorical inputs
-    towns = [
+# Build the lookup tables once instead of on every rerun. cache_resource
+# shares the objects across sessions, hence the tuples and read-only template.
+@st.cache_resource
+def _static_tables():
+    towns = (
         "ANG MO KIO",
         "BEDOK",
         "BISHAN",
@@ -88,42 +104,111 @@ with col2:
         "TOA PAYOH",
         "WOODLANDS",
         "YISHUN",
-    ]
-    selected_town = st.selectbox("Town", towns)
+    )
 
-    flat_types = [
+    flat_types = (
         "3 ROOM",
         "4 ROOM",
         "5 ROOM",
         "EXECUTIVE",
         "MULTI-GENERATION",
-    ]
-    selected_flat_type = st.selectbox("Flat Type", flat_types)
+    )
+
+    town_idx = {t: i for i, t in enumerate(towns)}
+    flat_idx = {t: i for i, t in enumerate(flat_types)}
+
+    # 4 numerical features followed by the town and flat_type one-hot blocks
+    template = np.zeros(4 + len(towns) + len(flat_types), dtype=np.float32)
+    template.flags.writeable = False
+
+    return towns, flat_types, town_idx, flat_idx, template
+
+booster = load_model(MODEL_NAME)
+
+if booster is None:
+    st.error(
+        "Could not load the model. Please check if the model file exists in the correct location."
+    )
+    st.stop()
+
+towns, flat_types, TOWN_IDX, FLAT_IDX, feature_template = _static_tables()
+
+# Input bounds, shared by the form widgets and batch CSV validation
+FLOOR_AREA_RANGE = (1.0, 500.0)
+LEASE_COMMENCE_DATE_RANGE = (1960, 2024)
+POSTAL_CODE_RANGE = (10000, 999999)
 
-# Create prediction button
-if st.button("Predict Price"):
+def encode_features(
+    floor_area, lease_commence_date, postal_code, current_year, town_idx, flat_idx
+):
+    # Build model input rows (same order as training data). Arguments may be
+    # scalars for a single row or equal-length arrays for a batch.
+    town_idx = np.atleast_1d(town_idx)
+    rows = np.arange(len(town_idx))
+
+    features = np.repeat(feature_template[np.newaxis, :], len(rows), axis=0)
+    features[:, 0] = floor_area
+    features[:, 1] = lease_commence_date
+    features[:, 2] = postal_code
+    features[:, 3] = current_year
+
+    # Town and flat_type one-hot encoding
+    features[rows, 4 + town_idx] = 1.0
+    features[rows, 4 + len(towns) + np.atleast_1d(flat_idx)] = 1.0
+    return features
+
+# Inputs live in a form so editing a field doesn't rerun the script; the
+# whole page reruns once, on submit.
+with st.form("predict_form"):
+    # Create columns for input
+    col1, col2 = st.columns(2)
+
+    with col1:
+        # Numerical inputs
+        floor_area = st.number_input(
+            "Floor Area (sqm)",
+            min_value=FLOOR_AREA_RANGE[0],
+            max_value=FLOOR_AREA_RANGE[1],
+            value=148.0,
+        )
+        lease_commence_date = st.number_input(
+            "Lease Commencement Date",
+            min_value=LEASE_COMMENCE_DATE_RANGE[0],
+            max_value=LEASE_COMMENCE_DATE_RANGE[1],
+            value=1992,
+        )
+        postal_code = st.number_input(
+            "Postal Code",
+            min_value=POSTAL_CODE_RANGE[0],
+            max_value=POSTAL_CODE_RANGE[1],
+            value=520329,
+        )
+        current_year = 2024  # You can make this dynamic if needed
+
+    with col2:
+        # Categorical inputs
+        selected_town = st.selectbox("Town", towns)
+        selected_flat_type = st.selectbox("Flat Type", flat_types)
+
+    # Create prediction button
+    predict_clicked = st.form_submit_button("Predict Price")
+
+if predict_clicked:
     try:
-        # Create the feature array (same order as training data)
-        features = [
+        features = encode_features(
             floor_area,
             lease_commence_date,
             postal_code,
             current_year,
-        ]
-
-        # Add town one-hot encoding
-        for town in towns:
-            features.append(1 if town == selected_town else 0)
-
-        # Add flat_type one-hot encoding
-        for flat_type in flat_types:
-            features.append(1 if flat_type == selected_flat_type else 0)
+            TOWN_IDX[selected_town],
+            FLAT_IDX[selected_flat_type],
+        )
 
         # Make prediction
-        prediction = model.predict([features])
+        prediction = booster.inplace_predict(features)
 
-        # Round to nearest 1,000
-        rounded_price = round(prediction[0] / 1000) * 1000
+        # Round half-up to nearest 1,000
+        rounded_price = int((prediction.item() + 500) // 1000) * 1000
 
         # Display prediction
         st.success(f"Predicted Resale Price: ${rounded_price:,.2f}")
@@ -145,6 +230,122 @@ if st.button("Predict Price"):
     except Exception as e:
         st.error(f"An error occurred during prediction: {str(e)}")
 
+# Batch prediction from an uploaded CSV: all rows are encoded into one matrix
+# and scored with a single inplace_predict call.
+BATCH_COLUMNS = [
+    "floor_area",
+    "lease_commence_date",
+    "postal_code",
+    "town",
+    "flat_type",
+]
+
+# current_year has no form widget; allow anything from the earliest lease
+# commencement date up to the year the model assumes.
+BATCH_NUMERIC_BOUNDS = {
+    "floor_area": FLOOR_AREA_RANGE,
+    "lease_commence_date": LEASE_COMMENCE_DATE_RANGE,
+    "postal_code": POSTAL_CODE_RANGE,
+    "current_year": (LEASE_COMMENCE_DATE_RANGE[0], current_year),
+}
+
+def _format_rows(bad):
+    # 1-based data row numbers of a boolean mask, capped for the error message
+    rows = ", ".join(str(i + 1) for i in np.flatnonzero(bad)[:10])
+    if bad.sum() > 10:
+        rows += ", ..."
+    return rows
+
+# Keyed on the file's bytes so reruns (e.g. a single-row submit) with the same
+# upload reuse the result instead of re-parsing and re-scoring every row. The
+# cache is shared by all sessions, so bound how many results it keeps and for
+# how long.
+@st.cache_data(max_entries=8, ttl=3600)
+def predict_batch(csv_bytes):
+    df = pd.read_csv(io.BytesIO(csv_bytes))
+
+    missing = [c for c in BATCH_COLUMNS if c not in df.columns]
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(missing)}")
+
+    town_idx = df["town"].map(TOWN_IDX)
+    flat_idx = df["flat_type"].map(FLAT_IDX)
+    unknown = sorted(
+        set(df["town"][town_idx.isna()].astype(str))
+        | set(df["flat_type"][flat_idx.isna()].astype(str))
+    )
+    if unknown:
+        raise ValueError(f"Unknown town or flat type: {', '.join(unknown)}")
+
+    # Blank cells would reach the model as NaN, which XGBoost treats as a
+    # missing value and still prices, so reject them along with anything the
+    # form itself would not accept.
+    problems = []
+    for column, (low, high) in BATCH_NUMERIC_BOUNDS.items():
+        if column not in df.columns:
+            continue
+        values = pd.to_numeric(df[column], errors="coerce")
+        bad = values.isna() | (values < low) | (values > high)
+        if bad.any():
+            problems.append(
+                f"{column} is blank, non-numeric or outside "
+                f"{low}-{high} in rows {_format_rows(bad)}"
+            )
+        df[column] = values
+
+    # The form can't produce a current year before the lease commenced
+    if "current_year" in df.columns:
+        bad = df["current_year"] < df["lease_commence_date"]
+        if bad.any():
+            problems.append(
+                "current_year is before lease_commence_date in rows "
+                f"{_format_rows(bad)}"
+            )
+    if problems:
+        raise ValueError("; ".join(problems))
+
+    features = encode_features(
+        df["floor_area"].to_numpy(),
+        df["lease_commence_date"].to_numpy(),
+        df["postal_code"].to_numpy(),
+        (
+            df["current_year"].to_numpy()
+            if "current_year" in df.columns
+            else current_year
+        ),
+        town_idx.to_numpy(dtype=np.intp),
+        flat_idx.to_numpy(dtype=np.intp),
+    )
+    predictions = booster.inplace_predict(features)
+
+    # Round half-up to nearest 1,000
+    df["predicted_price"] = (
+        (predictions.astype(np.float64) + 500) // 1000 * 1000
+    ).astype(np.int64)
+    return df, df.to_csv(index=False)
+
+with st.expander("Batch Prediction"):
+    st.write(
+        f"Upload a CSV with columns: {', '.join(BATCH_COLUMNS)}. "
+        f"An optional current_year column defaults to {current_year}."
+    )
+    uploaded = st.file_uploader("Batch CSV", type="csv")
+
+    if uploaded is not None:
+        try:
+            df, csv_text = predict_batch(uploaded.getvalue())
+
+            st.dataframe(df)
+            st.download_button(
+                "Download Predictions",
+                csv_text,
+                file_name="hdb_resale_predictions.csv",
+                mime="text/csv",
+            )
+
+        except Exception as e:
+            st.error(f"An error occurred during batch prediction: {str(e)}")
+
 # Add some information about the model
 with st.expander("Model Information"):
     st.write(